@@ -0,0 +1,185 @@
+"""
+Separable Lanczos resampling with precomputed filter weights.
+
+The weights only depend on the input and output sizes, so they are built
+once per monitor/scale change and reused for every captured frame instead
+of re-evaluating the sinc kernel per frame. Each axis is stored as a list
+of small dense bands (a block-sparse matrix) so a resize pass is a handful
+of cache-sized matrix multiplies. Requires numpy (installed with the
+turbojpeg extra).
+
+When numba is installed, resize_bgrx_to_rgb() fuses both passes, the
+alpha drop and the BGR->RGB swap into one parallel JIT-compiled kernel.
+"""
+
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# Optional JIT kernel
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+LANCZOS_LOBES = 3
+
+# Output rows/columns per band — small enough for the band to stay in cache
+BAND_SIZE = 32
+
+# (out_start, out_end, in_start, weights[out_end - out_start, in_len])
+Band = Tuple[int, int, int, np.ndarray]
+
+# (input indices [out_n, taps], weights [out_n, taps]) for one axis
+Taps = Tuple[np.ndarray, np.ndarray]
+
+
+def _lanczos(x: np.ndarray) -> np.ndarray:
+    """Evaluate the 3-lobed Lanczos window at x."""
+    x = np.abs(x)
+    return np.where(x < LANCZOS_LOBES, np.sinc(x) * np.sinc(x / LANCZOS_LOBES), 0.0)
+
+
+def make_lanczos_taps(in_n: int, out_n: int) -> Taps:
+    """
+    Compute the Lanczos taps for one axis.
+
+    Taps that fall outside the image are clamped to the edge pixel, and
+    every output sample's weights sum to 1.
+
+    Returns:
+        (indices, weights) — input positions and float32 weights, both
+        shaped [out_n, taps].
+    """
+    ratio = in_n / out_n
+    # Stretch the filter when downscaling so it also acts as the low-pass
+    filterscale = max(ratio, 1.0)
+    support = LANCZOS_LOBES * filterscale
+    taps = int(math.ceil(support)) * 2 + 1
+
+    center = (np.arange(out_n) + 0.5) * ratio
+    start = np.floor(center - support + 0.5).astype(np.intp)
+    idx = start[:, None] + np.arange(taps)
+
+    weights = _lanczos((idx + 0.5 - center[:, None]) / filterscale)
+    weights /= weights.sum(axis=1, keepdims=True)
+    np.clip(idx, 0, in_n - 1, out=idx)
+    return idx, weights.astype(np.float32)
+
+
+def make_lanczos_matrix(in_n: int, out_n: int) -> List[Band]:
+    """
+    Build the banded resampling matrix for one axis.
+
+    Returns:
+        List of bands covering the output axis in order.
+    """
+    idx, weights = make_lanczos_taps(in_n, out_n)
+    taps = idx.shape[1]
+
+    bands: List[Band] = []
+    for o0 in range(0, out_n, BAND_SIZE):
+        o1 = min(o0 + BAND_SIZE, out_n)
+        band_idx = idx[o0:o1]
+        i0 = int(band_idx.min())
+        i1 = int(band_idx.max()) + 1
+
+        matrix = np.zeros((o1 - o0, i1 - i0), np.float32)
+        rows = np.repeat(np.arange(o1 - o0), taps)
+        # add.at so clamped edge taps accumulate onto the border pixel
+        np.add.at(matrix, (rows, (band_idx - i0).ravel()), weights[o0:o1].ravel())
+        bands.append((o0, o1, i0, matrix))
+
+    return bands
+
+
+def apply_1d(src: np.ndarray, bands: List[Band], out_n: int, axis: int = 0) -> np.ndarray:
+    """
+    Resample an [H, W, C] array along axis 0 (rows) or 1 (columns).
+
+    src may be uint8 or float32; each band's input slice is converted to
+    float32 on the fly, so the whole frame is never materialised as float.
+    Returns a float32 array.
+    """
+    if axis == 0:
+        flat = src.reshape(src.shape[0], -1)
+        out = np.empty((out_n, flat.shape[1]), np.float32)
+        for o0, o1, i0, matrix in bands:
+            band = flat[i0:i0 + matrix.shape[1]].astype(np.float32, copy=False)
+            np.matmul(matrix, band, out=out[o0:o1])
+        return out.reshape((out_n,) + src.shape[1:])
+
+    # Columns: matmul broadcasts the band matrix over every row, so the
+    # image never needs transposing
+    out = np.empty((src.shape[0], out_n, src.shape[2]), np.float32)
+    for o0, o1, i0, matrix in bands:
+        band = src[:, i0:i0 + matrix.shape[1]].astype(np.float32, copy=False)
+        np.matmul(matrix, band, out=out[:, o0:o1])
+    return out
+
+
+def resize_bgrx(
+    src: np.ndarray,
+    ky: List[Band],
+    kx: List[Band],
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Resize an [H, W, 4] uint8 frame to the sizes ky/kx were built for.
+
+    If out is given it must be a uint8 [H', W', 4] array; it is filled and
+    returned, so callers can reuse one output buffer across frames.
+    """
+    tmp = apply_1d(src, ky, ky[-1][1], axis=0)
+    tmp = apply_1d(tmp, kx, kx[-1][1], axis=1)
+
+    tmp += 0.5
+    np.clip(tmp, 0, 255, out=tmp)
+    if out is None:
+        return tmp.astype(np.uint8)
+    np.copyto(out, tmp, casting="unsafe")
+    return out
+
+
+if NUMBA_AVAILABLE:
+
+    @njit(parallel=True, cache=True, fastmath=True)
+    def _resize_bgrx_to_rgb(src, dst, ky_idx, ky_w, kx_idx, kx_w):
+        in_w = src.shape[1]
+        for i in prange(dst.shape[0]):
+            # Vertical pass for this output row, BGR -> RGB on the way in
+            row = np.zeros((in_w, 3), np.float32)
+            for t in range(ky_idx.shape[1]):
+                sy = ky_idx[i, t]
+                wy = ky_w[i, t]
+                for x in range(in_w):
+                    row[x, 0] += wy * src[sy, x, 2]
+                    row[x, 1] += wy * src[sy, x, 1]
+                    row[x, 2] += wy * src[sy, x, 0]
+
+            # Horizontal pass straight into the uint8 output
+            for j in range(dst.shape[1]):
+                r = np.float32(0.5)
+                g = np.float32(0.5)
+                b = np.float32(0.5)
+                for t in range(kx_idx.shape[1]):
+                    sx = kx_idx[j, t]
+                    wx = kx_w[j, t]
+                    r += wx * row[sx, 0]
+                    g += wx * row[sx, 1]
+                    b += wx * row[sx, 2]
+                dst[i, j, 0] = min(max(r, 0.0), 255.0)
+                dst[i, j, 1] = min(max(g, 0.0), 255.0)
+                dst[i, j, 2] = min(max(b, 0.0), 255.0)
+
+
+def resize_bgrx_to_rgb(src: np.ndarray, dst: np.ndarray, ky: Taps, kx: Taps) -> np.ndarray:
+    """
+    Resize an [H, W, 4] BGRX frame into a preallocated [H', W', 3] RGB array.
+
+    Requires numba (check NUMBA_AVAILABLE first).
+    """
+    _resize_bgrx_to_rgb(src, dst, ky[0], ky[1], kx[0], kx[1])
+    return dst
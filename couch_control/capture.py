@@ -4,24 +4,48 @@ Supports turbojpeg for fast encoding, falls back to Pillow.
 Supports frame-skip to avoid sending unchanged frames.
 """
 
-import hashlib
 import io
+import threading
+import zlib
 from typing import Optional
 
 import mss
 import mss.tools
 
+# xxh3 is ~5x faster than CRC32 for frame-skip fingerprints
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
 # Try to import turbojpeg for faster encoding
 try:
-    from turbojpeg import TurboJPEG, TJPF_BGRA, TJSAMP_420
+    import numpy as np
+    from turbojpeg import TurboJPEG, TJPF_BGRX, TJPF_RGB, TJSAMP_420, TJSAMP_422, TJSAMP_444
+    from ._resize import (
+        NUMBA_AVAILABLE,
+        make_lanczos_matrix,
+        make_lanczos_taps,
+        resize_bgrx,
+        resize_bgrx_to_rgb,
+    )
     TURBOJPEG_AVAILABLE = True
     _jpeg = TurboJPEG()
+    _TJ_SUBSAMPLING = {"444": TJSAMP_444, "422": TJSAMP_422, "420": TJSAMP_420}
 except ImportError:
     TURBOJPEG_AVAILABLE = False
     _jpeg = None
 
 from PIL import Image
 
+# Pillow's JPEG "subsampling" codes
+_PIL_SUBSAMPLING = {"444": 0, "422": 1, "420": 2}
+
+# Frames between rebuilding the palette; in between frames are only mapped
+# onto the existing palette, which is ~2.5x cheaper than a fresh octree
+PALETTE_REFRESH_FRAMES = 30
+
 
 class ScreenCapture:
     """
@@ -32,6 +56,16 @@ class ScreenCapture:
     - Uses turbojpeg when available (10x faster, less memory)
     - Direct byte streaming (no intermediate Image objects when possible)
     - Frame-skip: returns None when screen is unchanged
+
+    Chroma subsampling ("420", "422" or "444") trades colour detail for
+    speed and size: 4:2:0 halves the chroma planes in both directions,
+    encodes fastest (libjpeg-turbo's SIMD downsampling paths) and is about
+    30% smaller; 4:4:4 keeps coloured text edges crisp at the cost of both.
+
+    palette_mode switches to a low-bandwidth mode that sends 256-colour
+    PNGs instead of JPEGs: flat UI content stays sharp where a low-quality
+    JPEG would be a blur of block artefacts. Photos and video compress far
+    worse as PNG, so the mode is opt-in.
     """
 
     def __init__(
@@ -41,18 +75,41 @@ class ScreenCapture:
         scale: float = 0.5,
         use_turbojpeg: bool = True,
         frame_skip: bool = True,
+        frame_skip_stride: int = 1,
+        subsample: str = "420",
+        palette_mode: bool = False,
     ):
         self.monitor_index = monitor
         self.quality = max(1, min(95, quality))
         self.scale = max(0.1, min(1.0, scale))
         self.use_turbojpeg = use_turbojpeg and TURBOJPEG_AVAILABLE
         self.frame_skip = frame_skip
+        self.frame_skip_stride = max(1, frame_skip_stride)
+        self.subsample = subsample if subsample in _PIL_SUBSAMPLING else "420"
+        self._pil_subsample = _PIL_SUBSAMPLING[self.subsample]
+        self._tj_subsample = _TJ_SUBSAMPLING[self.subsample] if self.use_turbojpeg else None
+        self.palette_mode = palette_mode
 
         # Create mss instance (reused for all captures)
         self._sct = mss.mss()
 
         # Frame skip state
-        self._last_frame_hash: Optional[bytes] = None
+        self._last_frame_hash: Optional[int] = None
+
+        # Reused output buffer for the Pillow encoders
+        self._out_buf = io.BytesIO()
+
+        # Palette mode state
+        self._palette_img: Optional[Image.Image] = None
+        self._palette_age = 0
+
+        # Serialises encoding against set_scale() when frames are encoded
+        # off the caller's thread
+        self._lock = threading.RLock()
+
+        # Size of the last grabbed frame; differs from the monitor rectangle
+        # on HiDPI displays, where mss returns physical pixels
+        self._frame_size: Optional[tuple] = None
 
         # Cache monitor info
         self._update_monitor_info()
@@ -70,8 +127,74 @@ class ScreenCapture:
         self._width = mon["width"]
         self._height = mon["height"]
 
-        self._scaled_width = max(1, int(self._width * self.scale))
-        self._scaled_height = max(1, int(self._height * self.scale))
+        # Integer downscale factor (2 for 0.5, 4 for 0.25, ...), or 0 when the
+        # scale is not a clean 1/k and a real resampler is needed
+        divisor = round(1.0 / self.scale)
+        if divisor > 1 and abs(1.0 / self.scale - divisor) < 1e-6:
+            self._block_divisor = divisor
+            self._scaled_width = self._width // divisor
+            self._scaled_height = self._height // divisor
+        else:
+            self._block_divisor = 0
+            self._scaled_width = max(1, int(self._width * self.scale))
+            self._scaled_height = max(1, int(self._height * self.scale))
+
+        self._select_encoder()
+
+    def _select_encoder(self) -> None:
+        """
+        Bind self._encode for the current scale and quality.
+
+        Called once per size or mode change so the per-frame path has no
+        branching. Scaled frames are written into output arrays allocated
+        here and reused every frame; they are only valid until the next
+        encode, and turbojpeg consumes them before the encoder returns.
+        """
+        self._resize_kernels = None
+        self._rgb_out = None
+        self._bgrx_out = None
+        self._block_acc = None
+        src_width, src_height = self._frame_size or (self._width, self._height)
+        scaled_shape = (self._scaled_height, self._scaled_width)
+
+        # Box factor from the grab to the scaled size: the scale's divisor,
+        # or a multiple of it for a HiDPI grab. Box averaging only applies
+        # when k×k blocks cover the whole grab (bar < k edge pixels) and
+        # their uint16 sums cannot overflow.
+        block_factor = 0
+        if self._block_divisor:
+            k = src_width // self._scaled_width
+            if (k <= 16 and src_width // k == self._scaled_width
+                    and src_height // k == self._scaled_height):
+                block_factor = k
+        self._block_factor = block_factor
+
+        if self.palette_mode:
+            self._palette_img = None
+            self._encode = self._encode_indexed
+        elif not self.use_turbojpeg:
+            self._encode = self._encode_pillow_scaled if self.scale < 1.0 else self._encode_pillow
+        elif self.scale >= 1.0:
+            self._encode = self._encode_turbojpeg
+        elif block_factor:
+            self._block_acc = np.empty(scaled_shape + (4,), np.uint16)
+            self._bgrx_out = np.empty(scaled_shape + (4,), np.uint8)
+            self._encode = self._encode_turbojpeg_block
+        elif NUMBA_AVAILABLE:
+            # Lanczos weights for non-integer scales, built once per size change
+            self._resize_kernels = (
+                make_lanczos_taps(src_height, self._scaled_height),
+                make_lanczos_taps(src_width, self._scaled_width),
+            )
+            self._rgb_out = np.empty(scaled_shape + (3,), np.uint8)
+            self._encode = self._encode_turbojpeg_resize_jit
+        else:
+            self._resize_kernels = (
+                make_lanczos_matrix(src_height, self._scaled_height),
+                make_lanczos_matrix(src_width, self._scaled_width),
+            )
+            self._bgrx_out = np.empty(scaled_shape + (4,), np.uint8)
+            self._encode = self._encode_turbojpeg_resize
 
     @property
     def width(self) -> int:
@@ -89,61 +212,175 @@ class ScreenCapture:
     def scaled_height(self) -> int:
         return self._scaled_height
 
-    def _compute_frame_hash(self, raw: memoryview) -> bytes:
-        """Compute a fast hash over a sample of raw frame bytes."""
-        # Sample every 500th byte — fast and catches most visual changes
-        sample = bytes(raw[::500])
-        return hashlib.md5(sample).digest()
+    def _compute_frame_hash(self, raw: bytearray) -> int:
+        """
+        Compute a fast fingerprint of the raw frame.
+
+        The fingerprint is 64-bit with xxh3, or 32-bit with the zlib.crc32
+        fallback; either way a false "unchanged" needs a hash collision
+        between consecutive frames.
+
+        With the default stride of 1 every byte is hashed, so even a single
+        typed character is detected; xxh3 does this in well under a
+        millisecond at 1080p. Larger strides hash every Nth byte only.
+        """
+        sample = raw if self.frame_skip_stride == 1 else raw[::self.frame_skip_stride]
+        if XXHASH_AVAILABLE:
+            return xxhash.xxh3_64_intdigest(sample)
+        return zlib.crc32(sample)
 
     def capture_jpeg(self) -> Optional[bytes]:
         """
         Capture screen and return JPEG bytes.
 
+        In palette mode the bytes are a PNG.
+
         Returns:
             JPEG image as bytes, or None if the frame is unchanged (frame_skip=True).
         """
-        sct_img = self._sct.grab(self._monitor)
+        return self._encode_frame(self._sct.grab(self._monitor))
+
+    def _encode_frame(self, sct_img) -> Optional[bytes]:
+        """Encode a grabbed frame, or return None if frame skip says it is unchanged."""
+        with self._lock:
+            if self.frame_skip:
+                frame_hash = self._compute_frame_hash(sct_img.raw)
+                if frame_hash == self._last_frame_hash:
+                    return None
+                self._last_frame_hash = frame_hash
+
+            # Resize kernels and buffers are sized for the grab, not the
+            # monitor rectangle; rebuild them if the grab size changes
+            if sct_img.size != self._frame_size:
+                self._frame_size = tuple(sct_img.size)
+                self._select_encoder()
+
+            return self._encode(sct_img)
+
+    @staticmethod
+    def _frame_array(sct_img):
+        """Zero-copy [H, W, 4] view over mss's BGRA buffer."""
+        width, height = sct_img.size
+        return np.frombuffer(sct_img.raw, dtype=np.uint8).reshape((height, width, 4))
 
-        if self.frame_skip:
-            frame_hash = self._compute_frame_hash(sct_img.raw)
-            if frame_hash == self._last_frame_hash:
-                return None
-            self._last_frame_hash = frame_hash
+    def _encode_turbojpeg(self, sct_img) -> bytes:
+        """Encode at full resolution using turbojpeg (reads BGRX natively)."""
+        return _jpeg.encode(
+            self._frame_array(sct_img),
+            quality=self.quality,
+            pixel_format=TJPF_BGRX,
+            jpeg_subsample=self._tj_subsample,
+        )
 
-        if self.use_turbojpeg and _jpeg is not None:
-            return self._encode_turbojpeg(sct_img)
-        else:
-            return self._encode_pillow(sct_img)
+    def _encode_turbojpeg_block(self, sct_img) -> bytes:
+        """Box-average by an integer factor, then encode with turbojpeg."""
+        arr = self._block_average(
+            self._frame_array(sct_img), self._block_factor, self._block_acc, self._bgrx_out
+        )
+        return _jpeg.encode(
+            arr,
+            quality=self.quality,
+            pixel_format=TJPF_BGRX,
+            jpeg_subsample=self._tj_subsample,
+        )
 
-    def _encode_turbojpeg(self, sct_img) -> bytes:
-        """Encode using turbojpeg (fast, low memory)."""
-        import numpy as np
+    def _encode_turbojpeg_resize(self, sct_img) -> bytes:
+        """Lanczos resize with the banded numpy kernels, then encode with turbojpeg."""
+        ky, kx = self._resize_kernels
+        arr = resize_bgrx(self._frame_array(sct_img), ky, kx, out=self._bgrx_out)
+        return _jpeg.encode(
+            arr,
+            quality=self.quality,
+            pixel_format=TJPF_BGRX,
+            jpeg_subsample=self._tj_subsample,
+        )
 
-        if self.scale < 1.0:
-            raw = bytes(sct_img.raw)
-            img = Image.frombytes("RGBA", (sct_img.width, sct_img.height), raw, "raw", "BGRA")
-            img = img.resize((self._scaled_width, self._scaled_height), Image.Resampling.LANCZOS)
-            img = img.convert("RGB")
-            arr = np.array(img)
-            return _jpeg.encode(arr, quality=self.quality)
-        else:
-            raw = bytes(sct_img.raw)
-            arr = np.frombuffer(raw, dtype=np.uint8).reshape((sct_img.height, sct_img.width, 4))
-            arr = arr[:, :, :3][:, :, ::-1]  # BGRA -> RGB
-            return _jpeg.encode(arr, quality=self.quality)
+    def _encode_turbojpeg_resize_jit(self, sct_img) -> bytes:
+        """Lanczos resize + BGRX->RGB with the numba kernel, then encode with turbojpeg."""
+        ky, kx = self._resize_kernels
+        arr = resize_bgrx_to_rgb(self._frame_array(sct_img), self._rgb_out, ky, kx)
+        return _jpeg.encode(
+            arr,
+            quality=self.quality,
+            pixel_format=TJPF_RGB,
+            jpeg_subsample=self._tj_subsample,
+        )
 
-    def _encode_pillow(self, sct_img) -> bytes:
-        """Encode using Pillow (fallback, slower)."""
-        img = Image.frombytes("RGBA", (sct_img.width, sct_img.height), bytes(sct_img.raw), "raw", "BGRA")
+    @staticmethod
+    def _block_average(arr, k: int, acc, out):
+        """
+        Downscale a BGRX frame by an integer factor k using k×k box averaging.
+
+        acc (uint16) and out (uint8) are preallocated [H/k, W/k, 4] arrays;
+        out is filled and returned.
+        """
+        h, w = out.shape[:2]
+        blocks = arr[: h * k, : w * k].reshape(h, k, w, k, 4)
+        # uint16 holds the sum of up to 16×16 uint8 samples without overflow
+        blocks.sum(axis=(1, 3), dtype=np.uint16, out=acc)
+        acc += (k * k) // 2
+        acc //= k * k
+        np.copyto(out, acc, casting="unsafe")
+        return out
+
+    @staticmethod
+    def _pillow_frame(sct_img) -> Image.Image:
+        """Decode mss's BGRA buffer straight to an RGB image (the raw decoder drops X)."""
+        return Image.frombuffer("RGB", sct_img.size, sct_img.raw, "raw", "BGRX", 0, 1)
 
+    def _encode_pillow(self, sct_img) -> bytes:
+        """Encode at full resolution using Pillow (fallback, slower)."""
+        return self._save_pillow_jpeg(self._pillow_frame(sct_img))
+
+    def _encode_pillow_scaled(self, sct_img) -> bytes:
+        """Resize and encode using Pillow (fallback, slower)."""
+        img = self._pillow_frame(sct_img)
+        img = img.resize((self._scaled_width, self._scaled_height), Image.Resampling.LANCZOS)
+        return self._save_pillow_jpeg(img)
+
+    def _encode_indexed(self, sct_img) -> bytes:
+        """Quantize to a 256-colour palette and encode as a fast PNG (low-bandwidth mode)."""
+        img = self._pillow_frame(sct_img)
         if self.scale < 1.0:
             img = img.resize((self._scaled_width, self._scaled_height), Image.Resampling.LANCZOS)
 
-        img = img.convert("RGB")
+        if self._palette_img is None or self._palette_age >= PALETTE_REFRESH_FRAMES:
+            indexed = img.quantize(colors=256, method=Image.Quantize.FASTOCTREE)
+            self._palette_img = indexed
+            self._palette_age = 0
+        else:
+            # Reuse the palette: no octree build, and no dithering noise to
+            # defeat PNG's filters or the client's frame-to-frame stability
+            indexed = img.quantize(palette=self._palette_img, dither=Image.Dither.NONE)
+        self._palette_age += 1
+
+        return self._save_pillow(indexed, format="PNG", optimize=False, compress_level=1)
+
+    def _save_pillow_jpeg(self, img: Image.Image) -> bytes:
+        return self._save_pillow(
+            img,
+            format="JPEG",
+            quality=self.quality,
+            optimize=False,
+            subsampling=self._pil_subsample,
+        )
 
-        buffer = io.BytesIO()
-        img.save(buffer, format="JPEG", quality=self.quality, optimize=False)
-        return buffer.getvalue()
+    def _save_pillow(self, img: Image.Image, **params) -> bytes:
+        """
+        Save img into the reused output buffer and return the encoded bytes.
+
+        The buffer is rewound rather than truncated (truncating gives the
+        memory back), so after the first frame Pillow writes without the
+        buffer having to grow. The result is still copied out as bytes:
+        the server may still be sending a frame to clients after the next
+        encode has started.
+        """
+        buffer = self._out_buf
+        buffer.seek(0)
+        img.save(buffer, **params)
+        size = buffer.tell()
+        with buffer.getbuffer() as view:
+            return view[:size].tobytes()
 
     def set_quality(self, quality: int) -> None:
         """Update JPEG quality."""
@@ -151,9 +388,10 @@ class ScreenCapture:
 
     def set_scale(self, scale: float) -> None:
         """Update scale factor."""
-        self.scale = max(0.1, min(1.0, scale))
-        self._update_monitor_info()
-        self._last_frame_hash = None  # Force next frame to send after scale change
+        with self._lock:
+            self.scale = max(0.1, min(1.0, scale))
+            self._update_monitor_info()
+            self._last_frame_hash = None  # Force next frame to send after scale change
 
     def force_next_frame(self) -> None:
         """Force the next capture to be sent regardless of frame skip."""
@@ -166,7 +404,6 @@ class ScreenCapture:
             self._sct = None
 
 
-# Singleton instance (created on first use)
 _capture_instance: Optional[ScreenCapture] = None
 
 
@@ -176,6 +413,9 @@ def get_capture(
     scale: float = 0.5,
     use_turbojpeg: bool = True,
     frame_skip: bool = True,
+    frame_skip_stride: int = 1,
+    subsample: str = "420",
+    palette_mode: bool = False,
 ) -> ScreenCapture:
     """Get or create the screen capture instance."""
     global _capture_instance
@@ -187,6 +427,9 @@ def get_capture(
             scale=scale,
             use_turbojpeg=use_turbojpeg,
             frame_skip=frame_skip,
+            frame_skip_stride=frame_skip_stride,
+            subsample=subsample,
+            palette_mode=palette_mode,
         )
 
     return _capture_instance
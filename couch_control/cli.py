@@ -43,25 +43,28 @@ def cmd_start(args) -> int:
         print(f"   Run 'couch-control stop' first")
         return 1
 
+    from dataclasses import replace
+
     from .config import reload_config
     from .server import run_server
 
-    config = reload_config()
-
+    overrides = {}
     if args.port:
-        config._config["server"]["port"] = args.port
+        overrides["port"] = args.port
     if args.quality:
-        config._config["capture"]["quality"] = args.quality
+        overrides["quality"] = args.quality
     if args.fps:
-        config._config["capture"]["fps"] = args.fps
+        overrides["fps"] = args.fps
     if args.scale:
-        config._config["capture"]["scale"] = args.scale
+        overrides["scale"] = args.scale
     if args.pin:
-        config._config["security"]["pin"] = args.pin
+        overrides["pin"] = args.pin
     if args.cloudflare:
-        config._config["cloudflare"]["enabled"] = True
+        overrides["cloudflare_enabled"] = True
     if args.no_frame_skip:
-        config._config["capture"]["frame_skip"] = False
+        overrides["frame_skip"] = False
+
+    config = replace(reload_config(), **overrides)
 
     write_pid()
 
@@ -173,6 +176,8 @@ def cmd_config(args) -> int:
     print(f"   - Scale:          {config.scale}")
     print(f"   - Monitor:        {config.monitor}")
     print(f"   - Frame skip:     {config.frame_skip}")
+    print(f"   - Subsampling:    {config.subsample}")
+    print(f"   - Palette mode:   {config.palette_mode}")
     print(f"   - PIN:            {'***' if config.pin else '(none)'}")
     print(f"   - Timeout:        {config.timeout_minutes} minutes")
     print(f"   - Max clients:    {config.max_clients}")
@@ -4,10 +4,10 @@ Supports YAML config files with sensible defaults.
 """
 
 import os
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, Optional
-
-import yaml
+from typing import Any, Dict, Optional, Tuple
 
 
 # Default configuration
@@ -24,6 +24,9 @@ DEFAULT_CONFIG = {
         "scale": 0.75,
         "monitor": 0,
         "frame_skip": True,
+        "frame_skip_stride": 1,
+        "subsample": "420",
+        "palette_mode": False,
     },
     "security": {
         "pin": "",
@@ -67,14 +70,24 @@ def get_config_paths() -> list[Path]:
 
 
 def deep_merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
-    """Deep merge two dictionaries."""
-    result = base.copy()
+    """
+    Deep merge two dictionaries.
 
-    for key, value in override.items():
-        if key in result and isinstance(result[key], dict) and isinstance(value, dict):
-            result[key] = deep_merge(result[key], value)
-        else:
-            result[key] = value
+    Neither input is modified; only the nested dicts that override actually
+    touches are copied, in a single iterative walk.
+    """
+    result = base.copy()
+    stack = [(result, override)]
+
+    while stack:
+        dst, src = stack.pop()
+        for key, value in src.items():
+            current = dst.get(key)
+            if isinstance(current, dict) and isinstance(value, dict):
+                current = dst[key] = current.copy()
+                stack.append((current, value))
+            else:
+                dst[key] = value
 
     return result
 
@@ -102,6 +115,9 @@ def load_config(config_path: Optional[Path] = None) -> Dict[str, Any]:
     for path in paths:
         if path.exists():
             try:
+                # Imported here so CLI commands that never read a file skip it
+                import yaml
+
                 with open(path, "r") as f:
                     file_config = yaml.safe_load(f) or {}
                 config = deep_merge(config, file_config)
@@ -112,13 +128,32 @@ def load_config(config_path: Optional[Path] = None) -> Dict[str, Any]:
     return config
 
 
-def get_local_ip() -> str:
+# Seconds a detected local IP is reused before interfaces are re-examined
+LOCAL_IP_TTL = 60.0
+
+_local_ip_cache: Optional[Tuple[float, str]] = None
+
+
+def _route_ip() -> Optional[str]:
     """
-    Get the local network IP address.
+    Address of the interface that routes to the internet.
 
-    Returns:
-        Local IP address string (e.g., "192.168.1.100")
+    connect() on a UDP socket only selects a route; no packet is sent, so
+    this also works offline as long as a default route exists.
     """
+    import socket
+
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.connect(("8.8.8.8", 80))
+            ip = s.getsockname()[0]
+    except OSError:
+        return None
+    return ip if not ip.startswith("127.") else None
+
+
+def _interface_ip() -> Optional[str]:
+    """First non-loopback IPv4 address from netifaces, preferring wired/wireless NICs."""
     try:
         import netifaces
 
@@ -154,110 +189,158 @@ def get_local_ip() -> str:
     except Exception:
         pass
 
-    # Final fallback using socket
-    try:
-        import socket
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        s.connect(("8.8.8.8", 80))
-        ip = s.getsockname()[0]
-        s.close()
-        return ip
-    except Exception:
-        pass
-
-    return "127.0.0.1"
+    return None
 
 
-class Config:
-    """Configuration wrapper with easy access to settings."""
-
-    def __init__(self, config_path: Optional[Path] = None):
-        self._config = load_config(config_path)
-
-        # Resolve "auto" host
-        if self._config["server"]["host"] == "auto":
-            self._config["server"]["host"] = get_local_ip()
-
-    @property
-    def host(self) -> str:
-        return self._config["server"]["host"]
-
-    @property
-    def port(self) -> int:
-        return self._config["server"]["port"]
-
-    @property
-    def tls_cert(self) -> str:
-        return self._config["server"].get("tls_cert", "")
-
-    @property
-    def tls_key(self) -> str:
-        return self._config["server"].get("tls_key", "")
-
-    @property
-    def quality(self) -> int:
-        return self._config["capture"]["quality"]
-
-    @property
-    def fps(self) -> int:
-        return self._config["capture"]["fps"]
-
-    @property
-    def scale(self) -> float:
-        return self._config["capture"]["scale"]
+def get_local_ip() -> str:
+    """
+    Get the local network IP address.
 
-    @property
-    def monitor(self) -> int:
-        return self._config["capture"]["monitor"]
+    The result is cached for LOCAL_IP_TTL seconds; call
+    invalidate_local_ip() after a network change to re-detect sooner.
 
-    @property
-    def frame_skip(self) -> bool:
-        return self._config["capture"].get("frame_skip", True)
+    Returns:
+        Local IP address string (e.g., "192.168.1.100")
+    """
+    global _local_ip_cache
 
-    @property
-    def pin(self) -> str:
-        return self._config["security"]["pin"]
+    now = time.monotonic()
+    if _local_ip_cache is not None and now - _local_ip_cache[0] < LOCAL_IP_TTL:
+        return _local_ip_cache[1]
 
-    @property
-    def timeout_minutes(self) -> int:
-        return self._config["security"]["timeout_minutes"]
+    ip = _route_ip() or _interface_ip()
+    if ip is None:
+        # Not cached, so a network coming up is picked up on the next call
+        return "127.0.0.1"
 
-    @property
-    def max_failed_pins(self) -> int:
-        return self._config["security"].get("max_failed_pins", 5)
+    _local_ip_cache = (now, ip)
+    return ip
 
-    @property
-    def require_pin_on_tunnel(self) -> bool:
-        return self._config["security"].get("require_pin_on_tunnel", True)
 
-    @property
-    def use_turbojpeg(self) -> bool:
-        return self._config["performance"]["use_turbojpeg"]
+def invalidate_local_ip() -> None:
+    """Forget the cached local IP so the next get_local_ip() re-detects it."""
+    global _local_ip_cache
+    _local_ip_cache = None
 
-    @property
-    def max_clients(self) -> int:
-        return self._config["performance"]["max_clients"]
 
-    @property
-    def cloudflare_enabled(self) -> bool:
-        return self._config["cloudflare"].get("enabled", False)
+@dataclass(frozen=True, slots=True)
+class Config:
+    """
+    Immutable, flattened configuration.
 
-    @property
-    def cloudflare_auto_start(self) -> bool:
-        return self._config["cloudflare"].get("auto_start", False)
+    Built once from the merged defaults + YAML dict, so every setting is a
+    plain slot attribute — no nested dict lookups on hot paths such as the
+    frame loop. Derive a modified copy with dataclasses.replace().
+    """
 
-    @property
-    def theme(self) -> str:
-        return self._config["ui"].get("theme", "auto")
+    host: str
+    port: int
+    tls_cert: str
+    tls_key: str
+    quality: int
+    fps: int
+    scale: float
+    monitor: int
+    frame_skip: bool
+    frame_skip_stride: int
+    subsample: str
+    palette_mode: bool
+    pin: str
+    timeout_minutes: int
+    max_failed_pins: int
+    require_pin_on_tunnel: bool
+    use_turbojpeg: bool
+    max_clients: int
+    cloudflare_enabled: bool
+    cloudflare_auto_start: bool
+    theme: str
+    # Frame interval in seconds, derived from fps
+    frame_interval: float = field(init=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "frame_interval", 1.0 / max(1, self.fps))
+
+    @classmethod
+    def load(cls, config_path: Optional[Path] = None) -> "Config":
+        """Load config from file (or default locations) and flatten it."""
+        return cls.from_dict(load_config(config_path))
+
+    @classmethod
+    def from_dict(cls, config: Dict[str, Any]) -> "Config":
+        """Flatten a nested config dictionary (as returned by load_config)."""
+        server = config["server"]
+        capture = config["capture"]
+        security = config["security"]
+        performance = config["performance"]
+        cloudflare = config["cloudflare"]
+        ui = config["ui"]
 
-    @property
-    def frame_interval(self) -> float:
-        """Get frame interval in seconds based on FPS."""
-        return 1.0 / max(1, self.fps)
+        # Resolve "auto" host
+        host = server["host"]
+        if host == "auto":
+            host = get_local_ip()
+
+        return cls(
+            host=host,
+            port=server["port"],
+            tls_cert=server.get("tls_cert", ""),
+            tls_key=server.get("tls_key", ""),
+            quality=capture["quality"],
+            fps=capture["fps"],
+            scale=capture["scale"],
+            monitor=capture["monitor"],
+            frame_skip=capture.get("frame_skip", True),
+            frame_skip_stride=capture.get("frame_skip_stride", 1),
+            subsample=str(capture.get("subsample", "420")),
+            palette_mode=capture.get("palette_mode", False),
+            pin=security["pin"],
+            timeout_minutes=security["timeout_minutes"],
+            max_failed_pins=security.get("max_failed_pins", 5),
+            require_pin_on_tunnel=security.get("require_pin_on_tunnel", True),
+            use_turbojpeg=performance["use_turbojpeg"],
+            max_clients=performance["max_clients"],
+            cloudflare_enabled=cloudflare.get("enabled", False),
+            cloudflare_auto_start=cloudflare.get("auto_start", False),
+            theme=ui.get("theme", "auto"),
+        )
 
     def to_dict(self) -> Dict[str, Any]:
-        """Return config as dictionary."""
-        return self._config.copy()
+        """Return config as a nested dictionary (same layout as the YAML file)."""
+        return {
+            "server": {
+                "port": self.port,
+                "host": self.host,
+                "tls_cert": self.tls_cert,
+                "tls_key": self.tls_key,
+            },
+            "capture": {
+                "quality": self.quality,
+                "fps": self.fps,
+                "scale": self.scale,
+                "monitor": self.monitor,
+                "frame_skip": self.frame_skip,
+                "frame_skip_stride": self.frame_skip_stride,
+                "subsample": self.subsample,
+                "palette_mode": self.palette_mode,
+            },
+            "security": {
+                "pin": self.pin,
+                "timeout_minutes": self.timeout_minutes,
+                "max_failed_pins": self.max_failed_pins,
+                "require_pin_on_tunnel": self.require_pin_on_tunnel,
+            },
+            "performance": {
+                "use_turbojpeg": self.use_turbojpeg,
+                "max_clients": self.max_clients,
+            },
+            "cloudflare": {
+                "enabled": self.cloudflare_enabled,
+                "auto_start": self.cloudflare_auto_start,
+            },
+            "ui": {
+                "theme": self.theme,
+            },
+        }
 
 
 # Global config instance
@@ -268,12 +351,12 @@ def get_config() -> Config:
     """Get or create the global config instance."""
     global _config
     if _config is None:
-        _config = Config()
+        _config = Config.load()
     return _config
 
 
 def reload_config(config_path: Optional[Path] = None) -> Config:
     """Reload configuration from file."""
     global _config
-    _config = Config(config_path)
+    _config = Config.load(config_path)
     return _config
@@ -11,7 +11,17 @@ import os
 import sys
 import shutil
 import subprocess
-from typing import Optional
+import threading
+import time
+from types import MappingProxyType
+from typing import Optional, Tuple
+
+# Pending mouse moves are flushed at most this often (latest position wins)
+MOVE_FLUSH_HZ = 120
+
+# Tool paths, resolved once at import
+_XDOTOOL_PATH = shutil.which("xdotool")
+_YDOTOOL_PATH = shutil.which("ydotool")
 
 
 def _detect_platform() -> str:
@@ -34,10 +44,19 @@ def _detect_platform() -> str:
 
 
 class X11InputHandler:
-    """Handle input using xdotool (X11 only)."""
+    """
+    Handle input using xdotool (X11 only).
+
+    Each command runs as a one-shot xdotool process, with its arguments
+    passed as argv so key names and text reach xdotool verbatim.
+
+    Mouse moves are coalesced: move_mouse() only records the target and a
+    drain thread issues one mousemove per tick. Any other command flushes
+    the pending move first so ordering is preserved.
+    """
 
     def __init__(self):
-        self._xdotool_path = shutil.which("xdotool")
+        self._xdotool_path = _XDOTOOL_PATH
         if not self._xdotool_path:
             raise RuntimeError(
                 "xdotool not found. Install it:\n"
@@ -45,9 +64,19 @@ class X11InputHandler:
                 "  sudo dnf install xdotool        # Fedora\n"
                 "  sudo pacman -S xdotool          # Arch"
             )
+        self._init_state()
+
+    def _init_state(self) -> None:
         self._screen_width: Optional[int] = None
         self._screen_height: Optional[int] = None
 
+        # Move coalescing
+        self._pending_move: Optional[Tuple[int, int]] = None
+        self._move_lock = threading.Lock()
+        self._move_event = threading.Event()
+        self._move_thread: Optional[threading.Thread] = None
+        self._closed = False
+
     def set_screen_size(self, width: int, height: int) -> None:
         self._screen_width = width
         self._screen_height = height
@@ -64,6 +93,31 @@ class X11InputHandler:
         except (subprocess.CalledProcessError, subprocess.TimeoutExpired, FileNotFoundError):
             return False
 
+    def _flush_move(self) -> None:
+        """Send the pending mouse move now, if there is one."""
+        with self._move_lock:
+            target = self._pending_move
+            self._pending_move = None
+            if target is not None:
+                self._run("mousemove", str(target[0]), str(target[1]))
+
+    def _move_loop(self) -> None:
+        interval = 1.0 / MOVE_FLUSH_HZ
+        while not self._closed:
+            self._move_event.wait()
+            self._move_event.clear()
+            self._flush_move()
+            # Let further moves accumulate before the next flush
+            time.sleep(interval)
+
+    def close(self) -> None:
+        """Stop the move drain thread."""
+        self._closed = True
+        self._move_event.set()
+        if self._move_thread is not None:
+            self._move_thread.join(timeout=1)
+            self._move_thread = None
+
     def _to_px(self, x: float, y: float, normalized: bool):
         if normalized:
             if self._screen_width is None:
@@ -75,9 +129,18 @@ class X11InputHandler:
         px, py = self._to_px(x, y, normalized)
         if px is None:
             return False
-        return self._run("mousemove", str(px), str(py))
+        with self._move_lock:
+            self._pending_move = (px, py)
+            if self._move_thread is None:
+                self._move_thread = threading.Thread(
+                    target=self._move_loop, name="couch-control-mouse", daemon=True
+                )
+                self._move_thread.start()
+        self._move_event.set()
+        return True
 
     def click(self, button: int = 1) -> bool:
+        self._flush_move()
         return self._run("click", str(button))
 
     def click_at(self, x: float, y: float, button: int = 1, normalized: bool = True) -> bool:
@@ -86,30 +149,38 @@ class X11InputHandler:
         return self.click(button)
 
     def double_click(self, button: int = 1) -> bool:
+        self._flush_move()
         return self._run("click", "--repeat", "2", "--delay", "100", str(button))
 
     def mouse_down(self, button: int = 1) -> bool:
+        self._flush_move()
         return self._run("mousedown", str(button))
 
     def mouse_up(self, button: int = 1) -> bool:
+        self._flush_move()
         return self._run("mouseup", str(button))
 
     def scroll(self, direction: str, amount: int = 3) -> bool:
         button = "4" if direction == "up" else "5"
+        self._flush_move()
         return self._run("click", "--repeat", str(amount), button)
 
     def type_text(self, text: str) -> bool:
         if not text:
             return True
+        self._flush_move()
         return self._run("type", "--delay", "12", "--", text)
 
     def key_press(self, key: str) -> bool:
+        self._flush_move()
         return self._run("key", "--", key)
 
     def key_down(self, key: str) -> bool:
+        self._flush_move()
         return self._run("keydown", "--", key)
 
     def key_up(self, key: str) -> bool:
+        self._flush_move()
         return self._run("keyup", "--", key)
 
 
@@ -120,7 +191,7 @@ class WaylandInputHandler(X11InputHandler):
     """Handle input using ydotool (Wayland)."""
 
     def __init__(self):
-        self._xdotool_path = shutil.which("ydotool")
+        self._xdotool_path = _YDOTOOL_PATH
         if not self._xdotool_path:
             raise RuntimeError(
                 "ydotool not found. Install it:\n"
@@ -128,8 +199,7 @@ class WaylandInputHandler(X11InputHandler):
                 "Also ensure ydotoold daemon is running:\n"
                 "  sudo systemctl enable --now ydotoold"
             )
-        self._screen_width: Optional[int] = None
-        self._screen_height: Optional[int] = None
+        self._init_state()
 
     # ydotool uses the same CLI interface as xdotool for basic commands
     # so inheriting X11InputHandler works for most operations.
@@ -157,6 +227,53 @@ class WindowsInputHandler:
         self._Key = Key
         self._KeyCode = KeyCode
 
+        # Key tables for _parse_key_combo(), built once
+        self._modifier_map = {
+            "ctrl": Key.ctrl,
+            "control": Key.ctrl,
+            "shift": Key.shift,
+            "alt": Key.alt,
+            "super": Key.cmd,
+            "win": Key.cmd,
+            "meta": Key.cmd,
+        }
+
+        self._special_map = {
+            "Return": Key.enter,
+            "return": Key.enter,
+            "enter": Key.enter,
+            "BackSpace": Key.backspace,
+            "backspace": Key.backspace,
+            "Tab": Key.tab,
+            "tab": Key.tab,
+            "Escape": Key.esc,
+            "escape": Key.esc,
+            "Delete": Key.delete,
+            "delete": Key.delete,
+            "Up": Key.up,
+            "up": Key.up,
+            "Down": Key.down,
+            "down": Key.down,
+            "Left": Key.left,
+            "left": Key.left,
+            "Right": Key.right,
+            "right": Key.right,
+            "Home": Key.home,
+            "home": Key.home,
+            "End": Key.end,
+            "end": Key.end,
+            "Page_Up": Key.page_up,
+            "Page_Down": Key.page_down,
+            "Insert": Key.insert,
+            "space": Key.space,
+            "F1": Key.f1, "F2": Key.f2, "F3": Key.f3, "F4": Key.f4,
+            "F5": Key.f5, "F6": Key.f6, "F7": Key.f7, "F8": Key.f8,
+            "F9": Key.f9, "F10": Key.f10, "F11": Key.f11, "F12": Key.f12,
+        }
+
+        # The on-screen keyboard's keys, parsed up front
+        self._combo_cache = {k: self._parse_key_combo(k) for k in _COMMON_KEYS}
+
         self._screen_width: Optional[int] = None
         self._screen_height: Optional[int] = None
 
@@ -214,69 +331,30 @@ class WindowsInputHandler:
         self._keyboard.type(text)
         return True
 
-    def _parse_key_combo(self, key_str: str):
-        """Parse 'ctrl+shift+c' into a list of pynput keys."""
-        Key = self._Key
+    def _parse_key_combo(self, key_str: str) -> Tuple:
+        """Parse 'ctrl+shift+c' into a tuple of pynput keys."""
+        modifier_map = self._modifier_map
+        special_map = self._special_map
         KeyCode = self._KeyCode
 
-        modifier_map = {
-            "ctrl": Key.ctrl,
-            "control": Key.ctrl,
-            "shift": Key.shift,
-            "alt": Key.alt,
-            "super": Key.cmd,
-            "win": Key.cmd,
-            "meta": Key.cmd,
-        }
-
-        special_map = {
-            "Return": Key.enter,
-            "return": Key.enter,
-            "enter": Key.enter,
-            "BackSpace": Key.backspace,
-            "backspace": Key.backspace,
-            "Tab": Key.tab,
-            "tab": Key.tab,
-            "Escape": Key.esc,
-            "escape": Key.esc,
-            "Delete": Key.delete,
-            "delete": Key.delete,
-            "Up": Key.up,
-            "up": Key.up,
-            "Down": Key.down,
-            "down": Key.down,
-            "Left": Key.left,
-            "left": Key.left,
-            "Right": Key.right,
-            "right": Key.right,
-            "Home": Key.home,
-            "home": Key.home,
-            "End": Key.end,
-            "end": Key.end,
-            "Page_Up": Key.page_up,
-            "Page_Down": Key.page_down,
-            "Insert": Key.insert,
-            "space": Key.space,
-            "F1": Key.f1, "F2": Key.f2, "F3": Key.f3, "F4": Key.f4,
-            "F5": Key.f5, "F6": Key.f6, "F7": Key.f7, "F8": Key.f8,
-            "F9": Key.f9, "F10": Key.f10, "F11": Key.f11, "F12": Key.f12,
-        }
-
-        parts = key_str.split("+")
         keys = []
-        for part in parts:
+        for part in key_str.split("+"):
             if part.lower() in modifier_map:
                 keys.append(modifier_map[part.lower()])
             elif part in special_map:
                 keys.append(special_map[part])
-            elif len(part) == 1:
-                keys.append(KeyCode(char=part))
             else:
                 keys.append(KeyCode(char=part))
+        return tuple(keys)
+
+    def _combo_keys(self, key_str: str) -> Tuple:
+        keys = self._combo_cache.get(key_str)
+        if keys is None:
+            keys = self._parse_key_combo(key_str)
         return keys
 
     def key_press(self, key: str) -> bool:
-        keys = self._parse_key_combo(key)
+        keys = self._combo_keys(key)
         for k in keys:
             self._keyboard.press(k)
         for k in reversed(keys):
@@ -284,13 +362,13 @@ class WindowsInputHandler:
         return True
 
     def key_down(self, key: str) -> bool:
-        keys = self._parse_key_combo(key)
+        keys = self._combo_keys(key)
         for k in keys:
             self._keyboard.press(k)
         return True
 
     def key_up(self, key: str) -> bool:
-        keys = self._parse_key_combo(key)
+        keys = self._combo_keys(key)
         for k in reversed(keys):
             self._keyboard.release(k)
         return True
@@ -333,8 +411,19 @@ def get_input_handler():
     return _handler_instance
 
 
+def close_input_handler() -> None:
+    """Close and clean up the input handler instance."""
+    global _handler_instance
+
+    if _handler_instance is not None:
+        close = getattr(_handler_instance, "close", None)
+        if close is not None:
+            close()
+        _handler_instance = None
+
+
 # Key name mapping from web key codes to xdotool/ydotool key names
-KEY_MAP = {
+_KEY_MAP = {
     "Enter": "Return",
     "Backspace": "BackSpace",
     "Tab": "Tab",
@@ -359,7 +448,19 @@ KEY_MAP = {
     " ": "space",
 }
 
+# Read-only public view; translate_key() reads the plain dict directly
+KEY_MAP = MappingProxyType(_KEY_MAP)
+_key_get = _KEY_MAP.get
+
 
 def translate_key(web_key: str) -> str:
     """Translate web key name to xdotool/pynput key name."""
-    return KEY_MAP.get(web_key, web_key)
+    return _key_get(web_key, web_key)
+
+
+# Keys sent by the web UI's on-screen keyboard, already translated
+_COMMON_KEYS = tuple(translate_key(k) for k in (
+    "Enter", "Backspace", "Tab", "Escape", "Up", "Down", "Left", "Right", "space",
+    "ctrl+c", "ctrl+v", "ctrl+z", "ctrl+shift+c", "ctrl+shift+v",
+    "ctrl+a", "ctrl+x", "ctrl+s",
+))
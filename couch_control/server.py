@@ -8,17 +8,98 @@ WebSocket endpoint: ws://host:port/ws
 """
 
 import asyncio
+import dataclasses
+import gzip
 import json
+import socket
+import struct
 import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, Optional, Set, Tuple
 
 import aiohttp
 from aiohttp import web
 
+# orjson is ~5x faster than the stdlib json aiohttp uses for /status
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 from .capture import ScreenCapture, get_capture, close_capture
 from .config import Config, get_config
-from .input_handler import get_input_handler, translate_key
+from .input_handler import close_input_handler, get_input_handler, translate_key
+
+# While frame skip finds nothing new, an empty binary message is sent this
+# often (seconds) so clients can tell a static screen from a dead link
+KEEPALIVE_INTERVAL = 5.0
+KEEPALIVE_FRAME = b""
+
+# Seconds the frame producer waits before retrying after a capture error
+FRAME_ERROR_BACKOFF = 1.0
+
+# Linux only: hold partial TCP segments while a frame is written, so the
+# WebSocket header and payload (separate transport writes for large
+# frames) leave as full segments instead of a tiny header packet first
+_TCP_CORK = getattr(socket, "TCP_CORK", None)
+
+# Text assets kept gzip-compressed in memory, keyed by suffix -> content type
+_GZIP_TYPES = {
+    ".html": "text/html",
+    ".js": "application/javascript",
+    ".css": "text/css",
+    ".json": "application/json",
+}
+_GZIP_HEADERS = {"Content-Encoding": "gzip", "Vary": "Accept-Encoding"}
+
+# Largest message accepted from a client. Inbound traffic is only input
+# events (clipboard text is capped at 2000 chars), so anything bigger is
+# malformed and closes the connection instead of being buffered.
+MAX_INPUT_MSG_SIZE = 64 * 1024
+
+# Binary input messages: a 1-byte opcode followed by a packed payload.
+# Mouse moves use this instead of JSON since they arrive at display rate.
+OP_MOVE = 1
+_MOVE_STRUCT = struct.Struct("<Bff")  # opcode, x, y (normalized 0-1)
+
+
+def _set_cork(sock: socket.socket, on: bool) -> bool:
+    """Toggle TCP_CORK; returns False if the socket doesn't support it."""
+    try:
+        sock.setsockopt(socket.IPPROTO_TCP, _TCP_CORK, int(on))
+        return True
+    except OSError:
+        return False
+
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """
+    Whether an Accept-Encoding header allows gzip.
+
+    An explicit "gzip" entry decides on its own q-value (so "gzip;q=0"
+    refuses it); otherwise a "*" entry with q > 0 allows it.
+    """
+    wildcard = False
+    for entry in accept_encoding.split(","):
+        coding, _, params = entry.partition(";")
+        coding = coding.strip().lower()
+        if coding not in ("gzip", "*"):
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding == "gzip":
+            return q > 0
+        wildcard = q > 0
+    return wildcard
 
 
 class CouchControlServer:
@@ -49,6 +130,20 @@ class CouchControlServer:
         self.http_runner: Optional[web.AppRunner] = None
         self.shutdown_event = asyncio.Event()
 
+        # Shared frame stream: one producer captures and encodes into
+        # _frame, then wakes every client's _stream_frames writer by setting
+        # _frame_event and replacing it with a fresh one. _frame_seq counts
+        # real frames so a writer can tell a new frame from a keepalive.
+        self._frame: Optional[bytes] = None
+        self._frame_seq = 0
+        self._frame_event = asyncio.Event()
+        self._has_clients = asyncio.Event()
+        self._producer_task: Optional[asyncio.Task] = None
+
+        # Grab + encode run here so they never block the event loop. One
+        # worker is enough: consecutive captures can't overlap anyway.
+        self._encode_pool: Optional[ThreadPoolExecutor] = None
+
         # Rate limiting: {ip: (fail_count, first_fail_time)}
         self._pin_failures: Dict[str, Tuple[int, float]] = {}
 
@@ -56,6 +151,36 @@ class CouchControlServer:
         self._tunnel = None
         self._tunnel_url: Optional[str] = None
 
+        # JSON input dispatch: event type -> handler(ws, data)
+        self._handlers = {
+            "ping": self._on_ping,
+            "clipboard": self._on_clipboard,
+            "click": self._on_click,
+            "dblclick": self._on_dblclick,
+            "move": self._on_move,
+            "mousedown": self._on_mousedown,
+            "mouseup": self._on_mouseup,
+            "scroll": self._on_scroll,
+            "keydown": self._on_key,
+            "keypress": self._on_key,
+            "type": self._on_type,
+            "settings": self._on_settings,
+        }
+
+        # Binary input dispatch: opcode -> handler(payload)
+        self._binary_handlers = {
+            OP_MOVE: self._handle_binary_move,
+        }
+
+        # Static assets, resolved once rather than stat'ed on every request
+        self._static_dir = Path(__file__).resolve().parent / "static"
+        self._static_index = self._static_dir / "index.html"
+        self._static_index_exists = self._static_index.is_file()
+        self._missing_static_body = b"Static files not found. Check installation."
+
+        # name -> (path, gzip body, content type, etag), compressed once here
+        self._gzip_assets: Dict[str, Tuple[Path, bytes, str, str]] = self._compress_static_assets()
+
         # Setup aiohttp app
         self.app = web.Application()
         self._setup_routes()
@@ -68,9 +193,48 @@ class CouchControlServer:
         self.app.router.add_get("/status", self._handle_status)
         self.app.router.add_get("/ws", self._websocket_handler)
 
-        static_path = Path(__file__).parent / "static"
-        if static_path.exists():
-            self.app.router.add_static("/static/", static_path)
+        # Compressible assets get explicit routes, registered before the
+        # generic static route so they take precedence
+        for name in self._gzip_assets:
+            self.app.router.add_get(f"/static/{name}", self._handle_static_asset)
+
+        if self._static_dir.is_dir():
+            self.app.router.add_static("/static/", self._static_dir)
+
+    def _compress_static_assets(self) -> Dict[str, Tuple[Path, bytes, str, str]]:
+        """
+        Gzip the UI's text assets once at startup.
+
+        They are small (tens of KB), so holding the compressed bytes saves
+        re-reading and re-compressing them on every page load or reconnect.
+        Edits to these files are therefore only picked up after a restart.
+        """
+        assets: Dict[str, Tuple[Path, bytes, str, str]] = {}
+        if not self._static_dir.is_dir():
+            return assets
+
+        for path in self._static_dir.iterdir():
+            content_type = _GZIP_TYPES.get(path.suffix)
+            if content_type is None or not path.is_file():
+                continue
+            raw = path.read_bytes()
+            etag = f"{zlib.crc32(raw):08x}"
+            assets[path.name] = (path, gzip.compress(raw, compresslevel=9, mtime=0), content_type, etag)
+        return assets
+
+    def _serve_asset(self, request: web.Request, name: str) -> web.StreamResponse:
+        """Serve a static asset gzipped from memory, or from disk if gzip isn't accepted."""
+        path, body, content_type, etag = self._gzip_assets[name]
+        if not _accepts_gzip(request.headers.get("Accept-Encoding", "")):
+            return web.FileResponse(path)
+
+        if_none_match = request.if_none_match
+        if if_none_match and any(tag.value == etag for tag in if_none_match):
+            response = web.Response(status=304, headers={"Vary": "Accept-Encoding"})
+        else:
+            response = web.Response(body=body, content_type=content_type, charset="utf-8", headers=_GZIP_HEADERS)
+        response.etag = etag
+        return response
 
     # ─────────────────────── Lazy init ───────────────────
 
@@ -82,15 +246,19 @@ class CouchControlServer:
                 scale=self.config.scale,
                 use_turbojpeg=self.config.use_turbojpeg,
                 frame_skip=self.config.frame_skip,
+                frame_skip_stride=self.config.frame_skip_stride,
+                subsample=self.config.subsample,
+                palette_mode=self.config.palette_mode,
             )
         return self._capture
 
     def _get_input(self):
-        if self._input is None:
-            self._input = get_input_handler()
+        input_handler = self._input
+        if input_handler is None:
+            input_handler = self._input = get_input_handler()
             capture = self._get_capture()
-            self._input.set_screen_size(capture.width, capture.height)
-        return self._input
+            input_handler.set_screen_size(capture.width, capture.height)
+        return input_handler
 
     def _update_activity(self) -> None:
         self.last_activity = time.time()
@@ -99,10 +267,12 @@ class CouchControlServer:
 
     async def _handle_index(self, request: web.Request) -> web.Response:
         self._update_activity()
-        static_path = Path(__file__).parent / "static" / "index.html"
-        if static_path.exists():
-            return web.FileResponse(static_path)
-        return web.Response(status=503, text="Static files not found. Check installation.")
+        if self._static_index_exists:
+            return self._serve_asset(request, self._static_index.name)
+        return web.Response(status=503, body=self._missing_static_body, content_type="text/plain")
+
+    async def _handle_static_asset(self, request: web.Request) -> web.StreamResponse:
+        return self._serve_asset(request, request.path.rsplit("/", 1)[-1])
 
     async def _handle_ping(self, request: web.Request) -> web.Response:
         return web.Response(text="pong")
@@ -127,6 +297,8 @@ class CouchControlServer:
             },
             "tunnel": self._tunnel_url,
         }
+        if ORJSON_AVAILABLE:
+            return web.Response(body=orjson.dumps(status), content_type="application/json")
         return web.json_response(status)
 
     # ─────────────────────── PIN / rate limiting ─────────
@@ -176,9 +348,12 @@ class CouchControlServer:
         if len(self.clients) >= self.config.max_clients:
             return web.Response(status=429, text="Too many clients connected.")
 
+        # No permessage-deflate: JPEG/PNG frames are already compressed, so
+        # zlib would burn CPU per frame per client for no size gain
         ws = web.WebSocketResponse(
-            max_msg_size=10 * 1024 * 1024,
+            max_msg_size=MAX_INPUT_MSG_SIZE,
             heartbeat=20,
+            compress=False,
         )
         await ws.prepare(request)
 
@@ -196,8 +371,8 @@ class CouchControlServer:
         # ── PIN authentication (client must reply with auth message) ──
         if self._pin_required():
             try:
-                auth_msg = await asyncio.wait_for(ws.__anext__(), timeout=15.0)
-            except (asyncio.TimeoutError, StopAsyncIteration):
+                auth_msg = await asyncio.wait_for(ws.receive(), timeout=15.0)
+            except asyncio.TimeoutError:
                 await ws.close(code=4401, message=b"Auth timeout")
                 return ws
 
@@ -219,14 +394,30 @@ class CouchControlServer:
                 return ws
 
         self.clients.add(ws)
-        frame_task = asyncio.create_task(self._stream_frames(ws))
-
+        self._has_clients.set()
+
+        sock = None
+        if _TCP_CORK is not None and request.transport is not None:
+            sock = request.transport.get_extra_info("socket")
+        frame_task = asyncio.create_task(self._stream_frames(ws, sock))
+
+        # Plain receive() loop: binary moves go straight to their handler,
+        # and anything other than data (close, closing, closed, error) ends
+        # the session. Pings are answered inside aiohttp.
+        receive = ws.receive
+        handle_binary = self._handle_input_binary
+        BINARY = aiohttp.WSMsgType.BINARY
+        TEXT = aiohttp.WSMsgType.TEXT
         try:
-            async for msg in ws:
-                self._update_activity()
-                if msg.type == aiohttp.WSMsgType.TEXT:
+            while True:
+                msg = await receive()
+                self.last_activity = time.time()
+                msg_type = msg.type
+                if msg_type is BINARY:
+                    handle_binary(msg.data)
+                elif msg_type is TEXT:
                     await self._handle_input(ws, msg.data)
-                elif msg.type in (aiohttp.WSMsgType.ERROR, aiohttp.WSMsgType.CLOSE):
+                else:
                     break
         except Exception:
             pass
@@ -237,28 +428,114 @@ class CouchControlServer:
             except asyncio.CancelledError:
                 pass
             self.clients.discard(ws)
+            if not self.clients:
+                self._has_clients.clear()
             print(f"Client disconnected: {client_ip}")
 
         return ws
 
     # ─────────────────────── Frame streaming ─────────────
 
-    async def _stream_frames(self, ws: web.WebSocketResponse) -> None:
-        """Stream JPEG frames to the client. Skips unchanged frames."""
-        capture = self._get_capture()
+    async def _producer_loop(self) -> None:
+        """
+        Capture and encode frames once for all clients.
+
+        Runs for the server's lifetime but idles while nobody is connected.
+        Unchanged frames (frame skip) wake no one, apart from a keepalive
+        every KEEPALIVE_INTERVAL seconds. Frames are published, not queued:
+        a client still sending the previous frame just picks up the newest
+        one when it is done, so a slow link never holds back the others.
+        """
         frame_interval = self.config.frame_interval
 
+        # Per-frame calls bound once as locals
+        run_in_executor = asyncio.get_running_loop().run_in_executor
+        encode_pool = self._encode_pool
+        has_clients = self._has_clients
+        is_shutdown = self.shutdown_event.is_set
+        publish = self._publish_frame
+        monotonic = time.monotonic
+        sleep = asyncio.sleep
+
+        capture_jpeg = None
         try:
-            while not self.shutdown_event.is_set() and not ws.closed:
-                start_time = time.time()
+            next_deadline = last_sent = monotonic()
+            while not is_shutdown():
+                if not has_clients.is_set():
+                    await has_clients.wait()
+                    next_deadline = last_sent = monotonic()
+
+                # A failed grab or encode (e.g. mid resolution change) must
+                # not end the only producer: log it, back off, try again
+                try:
+                    if capture_jpeg is None:
+                        capture_jpeg = self._get_capture().capture_jpeg
+                    jpeg_bytes = await run_in_executor(encode_pool, capture_jpeg)
+
+                    if jpeg_bytes is not None:
+                        self._frame = jpeg_bytes
+                        self._frame_seq += 1
+                        publish()
+                        last_sent = monotonic()
+                    elif monotonic() - last_sent >= KEEPALIVE_INTERVAL:
+                        publish()
+                        last_sent = monotonic()
+                except Exception as e:
+                    if is_shutdown():
+                        break
+                    print(f"Frame error: {e}")
+                    await sleep(FRAME_ERROR_BACKOFF)
+                    next_deadline = monotonic()
+                    continue
+
+                # Fixed deadlines absorb a slow frame in the next cycle instead
+                # of losing the time for good; resync after a long stall
+                next_deadline += frame_interval
+                sleep_for = next_deadline - monotonic()
+                if sleep_for > 0:
+                    await sleep(sleep_for)
+                else:
+                    next_deadline = monotonic()
+                    await sleep(0)
 
-                jpeg_bytes = capture.capture_jpeg()
+        except asyncio.CancelledError:
+            pass
 
-                if jpeg_bytes is not None and not ws.closed:
-                    await ws.send_bytes(jpeg_bytes)
+    def _publish_frame(self) -> None:
+        """Wake every writer; the next wait() goes to a fresh event."""
+        event, self._frame_event = self._frame_event, asyncio.Event()
+        event.set()
+
+    async def _stream_frames(self, ws: web.WebSocketResponse, sock: Optional[socket.socket] = None) -> None:
+        """
+        Send the newest shared frame to the client whenever one is published.
+
+        A new client starts at sequence 0, so it gets the current screen
+        straight away — with frame skip a static screen would otherwise
+        send nothing new. A wake-up with no new frame is a keepalive.
+        If sock is given, each frame is sent between TCP_CORK on and off.
+        """
+        sent_seq = 0
+        send_bytes = ws.send_bytes
+        is_shutdown = self.shutdown_event.is_set
+        try:
+            while not is_shutdown() and not ws.closed:
+                if self._frame_seq == sent_seq:
+                    await self._frame_event.wait()
+                if self._frame_seq != sent_seq:
+                    sent_seq = self._frame_seq
+                    jpeg_bytes = self._frame
+                else:
+                    jpeg_bytes = KEEPALIVE_FRAME
 
-                elapsed = time.time() - start_time
-                await asyncio.sleep(max(0.001, frame_interval - elapsed))
+                if ws.closed:
+                    break
+                corked = sock is not None and _set_cork(sock, True)
+                try:
+                    await send_bytes(jpeg_bytes)
+                finally:
+                    if corked:
+                        _set_cork(sock, False)
 
         except asyncio.CancelledError:
             pass
@@ -270,6 +547,28 @@ class CouchControlServer:
 
     # ─────────────────────── Input handling ──────────────
 
+    def _handle_input_binary(self, data: bytes) -> None:
+        """Dispatch a binary input message on its opcode byte."""
+        if not data:
+            return
+        handler = self._binary_handlers.get(data[0])
+        if handler is None:
+            return
+        try:
+            handler(data)
+        except Exception as e:
+            print(f"Input error: {e}")
+
+    def _handle_binary_move(self, data: bytes) -> None:
+        # No coalescing here: the client already sends at most one move per
+        # animation frame, and the xdotool/ydotool handlers keep only the
+        # latest target and flush it at MOVE_FLUSH_HZ (or before any click,
+        # key or scroll). move_mouse() just records the target.
+        _, x, y = _MOVE_STRUCT.unpack_from(data)
+        x = max(0.0, min(1.0, x))
+        y = max(0.0, min(1.0, y))
+        self._get_input().move_mouse(x, y, normalized=True)
+
     async def _handle_input(self, ws: web.WebSocketResponse, message: str) -> None:
         """Dispatch an input event from the client."""
         try:
@@ -277,97 +576,92 @@ class CouchControlServer:
         except json.JSONDecodeError:
             return
 
-        event_type = data.get("type", "")
-
-        # Ping/pong for latency measurement
-        if event_type == "ping":
-            await ws.send_json({"type": "pong", "t": data.get("t", 0)})
-            return
-
-        # Clipboard text from browser
-        if event_type == "clipboard":
-            text = data.get("text", "")
-            if text:
-                try:
-                    input_handler = self._get_input()
-                    input_handler.type_text(text[:2000])  # limit length
-                except Exception as e:
-                    print(f"Clipboard error: {e}")
+        handler = self._handlers.get(data.get("type", ""))
+        if handler is None:
             return
+        try:
+            await handler(ws, data)
+        except Exception as e:
+            print(f"Input error: {e}")
 
+    @staticmethod
+    def _safe_coord(val, default: float = 0.0) -> float:
+        """Parse a normalized coordinate, clamped to 0-1."""
         try:
-            input_handler = self._get_input()
+            v = float(val)
+            return max(0.0, min(1.0, v))
+        except (TypeError, ValueError):
+            return default
 
-            # Validate coordinate bounds
-            def safe_coord(val, default=0.0):
-                try:
-                    v = float(val)
-                    return max(0.0, min(1.0, v))
-                except (TypeError, ValueError):
-                    return default
-
-            if event_type == "click":
-                x = safe_coord(data.get("x"))
-                y = safe_coord(data.get("y"))
-                button = int(data.get("button", 1))
-                if button not in (1, 2, 3):
-                    button = 1
-                input_handler.click_at(x, y, button, normalized=True)
-
-            elif event_type == "dblclick":
-                x = safe_coord(data.get("x"))
-                y = safe_coord(data.get("y"))
-                input_handler.move_mouse(x, y, normalized=True)
-                input_handler.double_click()
-
-            elif event_type == "move":
-                x = safe_coord(data.get("x"))
-                y = safe_coord(data.get("y"))
-                input_handler.move_mouse(x, y, normalized=True)
-
-            elif event_type == "mousedown":
-                button = int(data.get("button", 1))
-                if button not in (1, 2, 3):
-                    button = 1
-                input_handler.mouse_down(button)
-
-            elif event_type == "mouseup":
-                button = int(data.get("button", 1))
-                if button not in (1, 2, 3):
-                    button = 1
-                input_handler.mouse_up(button)
-
-            elif event_type == "scroll":
-                direction = data.get("direction", "down")
-                if direction not in ("up", "down"):
-                    direction = "down"
-                amount = max(1, min(10, int(data.get("amount", 3))))
-                input_handler.scroll(direction, amount)
-
-            elif event_type in ("keydown", "keypress"):
-                key = data.get("key", "")
-                if key and len(key) < 64:
-                    xkey = translate_key(key)
-                    input_handler.key_press(xkey)
-
-            elif event_type == "type":
-                text = data.get("text", "")
-                if text and len(text) <= 1000:
-                    input_handler.type_text(text)
-
-            elif event_type == "settings":
-                capture = self._get_capture()
-                if "quality" in data:
-                    q = max(10, min(95, int(data["quality"])))
-                    capture.set_quality(q)
-                if "scale" in data:
-                    s = max(0.25, min(1.0, float(data["scale"])))
-                    capture.set_scale(s)
-                    if self._input:
-                        self._input.set_screen_size(capture.width, capture.height)
+    @staticmethod
+    def _safe_button(val) -> int:
+        button = int(val)
+        return button if button in (1, 2, 3) else 1
 
-        except Exception as e:
-            print(f"Input error: {e}")
+    async def _on_ping(self, ws: web.WebSocketResponse, data: dict) -> None:
+        # Ping/pong for latency measurement
+        await ws.send_json({"type": "pong", "t": data.get("t", 0)})
+
+    async def _on_clipboard(self, ws: web.WebSocketResponse, data: dict) -> None:
+        # Clipboard text from browser
+        text = data.get("text", "")
+        if text:
+            try:
+                self._get_input().type_text(text[:2000])  # limit length
+            except Exception as e:
+                print(f"Clipboard error: {e}")
+
+    async def _on_click(self, ws: web.WebSocketResponse, data: dict) -> None:
+        x = self._safe_coord(data.get("x"))
+        y = self._safe_coord(data.get("y"))
+        button = self._safe_button(data.get("button", 1))
+        self._get_input().click_at(x, y, button, normalized=True)
+
+    async def _on_dblclick(self, ws: web.WebSocketResponse, data: dict) -> None:
+        x = self._safe_coord(data.get("x"))
+        y = self._safe_coord(data.get("y"))
+        input_handler = self._get_input()
+        input_handler.move_mouse(x, y, normalized=True)
+        input_handler.double_click()
+
+    async def _on_move(self, ws: web.WebSocketResponse, data: dict) -> None:
+        x = self._safe_coord(data.get("x"))
+        y = self._safe_coord(data.get("y"))
+        self._get_input().move_mouse(x, y, normalized=True)
+
+    async def _on_mousedown(self, ws: web.WebSocketResponse, data: dict) -> None:
+        self._get_input().mouse_down(self._safe_button(data.get("button", 1)))
+
+    async def _on_mouseup(self, ws: web.WebSocketResponse, data: dict) -> None:
+        self._get_input().mouse_up(self._safe_button(data.get("button", 1)))
+
+    async def _on_scroll(self, ws: web.WebSocketResponse, data: dict) -> None:
+        direction = data.get("direction", "down")
+        if direction not in ("up", "down"):
+            direction = "down"
+        amount = max(1, min(10, int(data.get("amount", 3))))
+        self._get_input().scroll(direction, amount)
+
+    async def _on_key(self, ws: web.WebSocketResponse, data: dict) -> None:
+        key = data.get("key", "")
+        if key and len(key) < 64:
+            self._get_input().key_press(translate_key(key))
+
+    async def _on_type(self, ws: web.WebSocketResponse, data: dict) -> None:
+        text = data.get("text", "")
+        if text and len(text) <= 1000:
+            self._get_input().type_text(text)
+
+    async def _on_settings(self, ws: web.WebSocketResponse, data: dict) -> None:
+        capture = self._get_capture()
+        if "quality" in data:
+            q = max(10, min(95, int(data["quality"])))
+            capture.set_quality(q)
+        if "scale" in data:
+            s = max(0.25, min(1.0, float(data["scale"])))
+            capture.set_scale(s)
+            if self._input:
+                self._input.set_screen_size(capture.width, capture.height)
 
     # ─────────────────────── Tunnel ──────────────────────
 
@@ -422,6 +716,26 @@ class CouchControlServer:
         )
         await site.start()
 
+        self._encode_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="couch-control-encode")
+        self._producer_task = asyncio.create_task(self._producer_loop())
+
+        # Set up input now rather than on the first event, so a missing
+        # xdotool/ydotool/pynput is reported at startup
+        try:
+            input_handler = get_input_handler()
+        except RuntimeError as e:
+            print(f"Warning: input control unavailable: {e}")
+        else:
+            # Capture can fail on its own (e.g. no $DISPLAY); leave _input
+            # unset so _get_input() retries once a client connects
+            try:
+                capture = self._get_capture()
+            except Exception as e:
+                print(f"Warning: screen capture unavailable: {e}")
+            else:
+                input_handler.set_screen_size(capture.width, capture.height)
+                self._input = input_handler
+
         # Start tunnel if enabled
         if self.config.cloudflare_enabled or self.config.cloudflare_auto_start:
             await self._start_tunnel()
@@ -448,6 +762,22 @@ class CouchControlServer:
         """Stop the server and clean up resources."""
         self.shutdown_event.set()
 
+        # Stop the frame producer before its capture is closed
+        if self._producer_task:
+            self._producer_task.cancel()
+            try:
+                await self._producer_task
+            except asyncio.CancelledError:
+                pass
+            self._producer_task = None
+        if self._encode_pool:
+            # Let an in-flight capture finish so close_capture() can't pull
+            # the mss handle out from under it
+            await asyncio.get_running_loop().run_in_executor(
+                None, lambda: self._encode_pool.shutdown(wait=True)
+            )
+            self._encode_pool = None
+
         # Stop tunnel
         if self._tunnel and self._tunnel.is_running:
             await self._tunnel.stop()
@@ -464,8 +794,9 @@ class CouchControlServer:
         if self.http_runner:
             await self.http_runner.cleanup()
 
-        # Cleanup capture
+        # Cleanup capture and input
         close_capture()
+        close_input_handler()
         self._capture = None
         self._input = None
 
@@ -494,7 +825,7 @@ class CouchControlServer:
 
     def enable_tunnel(self) -> None:
         """Enable Cloudflare Tunnel at runtime (safe to call from tray thread)."""
-        self.config._config["cloudflare"]["enabled"] = True
+        self.config = dataclasses.replace(self.config, cloudflare_enabled=True)
         try:
             loop = asyncio.get_running_loop()
             loop.call_soon_threadsafe(lambda: asyncio.ensure_future(self._start_tunnel()))
@@ -506,7 +837,7 @@ class CouchControlServer:
         if self._tunnel:
             await self._tunnel.stop()
         self._tunnel_url = None
-        self.config._config["cloudflare"]["enabled"] = False
+        self.config = dataclasses.replace(self.config, cloudflare_enabled=False)
 
 
 def run_server(config: Optional[Config] = None, enable_tunnel: bool = False) -> None:
@@ -516,7 +847,7 @@ def run_server(config: Optional[Config] = None, enable_tunnel: bool = False) ->
     server = CouchControlServer(config)
 
     if enable_tunnel:
-        server.config._config["cloudflare"]["enabled"] = True
+        server.config = dataclasses.replace(server.config, cloudflare_enabled=True)
 
     def handle_signal(signum, frame):
         server.shutdown_event.set()
@@ -528,7 +859,14 @@ def run_server(config: Optional[Config] = None, enable_tunnel: bool = False) ->
         # Windows / non-main-thread contexts may not support all signals
         pass
 
+    # uvloop (optional) cuts per-message overhead for frames and input
+    try:
+        import uvloop
+        run = uvloop.run
+    except ImportError:
+        run = asyncio.run
+
     try:
-        asyncio.run(server.run_forever())
+        run(server.run_forever())
     except KeyboardInterrupt:
         pass
@@ -226,10 +226,13 @@
     // ── Frame rendering ──────────────────────────────────────────────────────
 
     function renderFrame(arrayBuffer) {
+        if (arrayBuffer.byteLength === 0) return; // Keepalive: screen unchanged
         if (pendingDecode) return; // Drop if previous frame still decoding
         pendingDecode = true;
 
-        const blob = new Blob([arrayBuffer], { type: 'image/jpeg' });
+        // Low-bandwidth mode sends 256-colour PNGs (first byte 0x89)
+        const isPng = new Uint8Array(arrayBuffer, 0, 1)[0] === 0x89;
+        const blob = new Blob([arrayBuffer], { type: isPng ? 'image/png' : 'image/jpeg' });
 
         if ('createImageBitmap' in window) {
             createImageBitmap(blob).then(bitmap => {
@@ -330,16 +333,30 @@
 
     // ── Throttled mouse move ─────────────────────────────────────────────────
 
+    // Moves go out as a 9-byte binary message: opcode 1, x, y (float32 LE).
+    // WebSocket.send() copies the bytes, so one buffer is reused.
+    const moveBuf  = new ArrayBuffer(9);
+    const moveView = new DataView(moveBuf);
+    moveView.setUint8(0, 1);
+
+    function sendMoveNow(x, y) {
+        if (ws && ws.readyState === WebSocket.OPEN) {
+            moveView.setFloat32(1, x, true);
+            moveView.setFloat32(5, y, true);
+            ws.send(moveBuf);
+        }
+    }
+
     function scheduledMove() {
         if (pendingMove) {
-            send(pendingMove);
+            sendMoveNow(pendingMove.x, pendingMove.y);
             pendingMove = null;
         }
         moveScheduled = false;
     }
 
     function sendMove(x, y) {
-        pendingMove = { type: 'move', x, y };
+        pendingMove = { x, y };
         if (!moveScheduled) {
             moveScheduled = true;
             requestAnimationFrame(scheduledMove);
@@ -385,11 +402,11 @@
         };
 
         if (isDragMode) {
-            send({ type: 'move', x: coords.x, y: coords.y });
+            sendMoveNow(coords.x, coords.y);
             send({ type: 'mousedown', button: 1 });
             touchState.isDragging = true;
         } else {
-            send({ type: 'move', x: coords.x, y: coords.y });
+            sendMoveNow(coords.x, coords.y);
             longPressTimer = setTimeout(() => {
                 touchState.didLongPress = true;
                 longPressTimer = null;
@@ -570,7 +587,7 @@
 
     document.getElementById('btn-send').addEventListener('click', () => {
         if (textInput.value) {
-            send({ type: 'type', text: textInput.value });
+            send({ type: 'type', text: textInput.value.slice(0, 1000) });
             textInput.value = '';
             textInput.focus();
         }
@@ -580,7 +597,7 @@
         if (e.key === 'Enter') {
             e.preventDefault();
             if (textInput.value) {
-                send({ type: 'type', text: textInput.value });
+                send({ type: 'type', text: textInput.value.slice(0, 1000) });
                 textInput.value = '';
             }
             send({ type: 'keypress', key: 'Enter' });
@@ -598,12 +615,12 @@
         try {
             const text = await navigator.clipboard.readText();
             if (text) {
-                send({ type: 'clipboard', text });
+                send({ type: 'clipboard', text: text.slice(0, 2000) });
             }
         } catch (e) {
             // Clipboard API might be unavailable or user denied
             const text = prompt('Paste your text here (clipboard API unavailable):');
-            if (text) send({ type: 'clipboard', text });
+            if (text) send({ type: 'clipboard', text: text.slice(0, 2000) });
         }
     });
 